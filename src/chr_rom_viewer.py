@@ -2,7 +2,6 @@ import getopt
 import pygame
 import sys
 
-from bitarray.util import int2ba
 from chr.chr_obj import CHRObj
 
 def read_chr(rom, page, tile) -> CHRObj:
@@ -20,21 +19,13 @@ def read_chr(rom, page, tile) -> CHRObj:
         plane1.append(rom[address | n])
 
     pixel_array = pygame.PixelArray(chr.image)
+    colors = (chr.COLOR0, chr.COLOR1, chr.COLOR2, chr.COLOR3)
 
     x = 0
     y = 0
     for (pixels0, pixels1) in zip(plane0, plane1):
-        ba_pixels0 = int2ba(pixels0, 8, 'big', 0)
-        ba_pixels1 = int2ba(pixels1, 8, 'big', 0)
-        for (pixel0, pixel1) in zip(ba_pixels0, ba_pixels1):
-            if pixel0 == 0 and pixel1 == 0:
-                pixel_array[x, y] = chr.COLOR0
-            elif pixel0 == 1 and pixel1 == 0:
-                pixel_array[x, y] = chr.COLOR1
-            elif pixel0 == 0 and pixel1 == 1:
-                pixel_array[x, y] = chr.COLOR2
-            elif pixel0 == 1 and pixel1 == 1:
-                pixel_array[x, y] = chr.COLOR3
+        for shift in range(7, -1, -1):
+            pixel_array[x, y] = colors[((pixels0 >> shift) & 1) | (((pixels1 >> shift) & 1) << 1)]
             x += 1
         x = 0
         y += 1
@@ -12,26 +12,53 @@ class Bus:
         self.ro_mmap = ro_mmap
         self.w_mmap = w_mmap
 
+        # One handler per 8K page of the CPU address space, so a read or
+        # write is a single index instead of a mirror check plus a dict
+        # lookup. Page 1 holds the PPU registers and their mirrors, page 2
+        # holds OAM DMA, everything else belongs to the MPU.
+        self._read_pages = (
+            mpu.read,
+            self._read_ppu,
+            mpu.read,
+            mpu.read,
+            mpu.read,
+            mpu.read,
+            mpu.read,
+            mpu.read
+        )
+        self._write_pages = (
+            mpu.write,
+            self._write_ppu,
+            self._write_io,
+            mpu.write,
+            mpu.write,
+            mpu.write,
+            mpu.write,
+            mpu.write
+        )
+
     def read(self, loc:int) -> int:
-        loc = self._mirror_map_ppu(loc)
+        return self._read_pages[loc >> 13](loc)
 
+    def _read_ppu(self, loc:int) -> int:
+        loc = 0x2000 | (loc & 0x07)
         if loc in self.ro_mmap:
             return self.ppu.read(loc)
         else:
             return self.mpu.read(loc)
 
-    def _mirror_map_ppu(self, loc:int) -> int:
-        if loc >= 0x2008 and loc <= 0x3FFF:
-            print("REMAPPED PPU")
-            return ((loc % 0x2000) % 8) | 0x2000
-        else:
-            return loc
-
     def write(self, loc:int, data:int) -> None:
-        loc = self._mirror_map_ppu(loc)
-        if loc in self.w_mmap and loc != OAM.DMA:
+        self._write_pages[loc >> 13](loc, data)
+
+    def _write_ppu(self, loc:int, data:int) -> None:
+        loc = 0x2000 | (loc & 0x07)
+        if loc in self.w_mmap:
             self.ppu.write(loc, data)
-        elif loc in self.w_mmap and loc == OAM.DMA:
+        else:
+            self.mpu.write(loc, data)
+
+    def _write_io(self, loc:int, data:int) -> None:
+        if loc == OAM.DMA:
             self.ppu.write(loc, data)
             self.mpu.dma_transfer(
                 self.ppu.dma(),
@@ -41,4 +68,4 @@ class Bus:
             self.mpu.write(loc, data)
 
     def nmi(self) -> None:
-        self.mpu.nmi()
\ No newline at end of file
+        self.mpu.nmi()
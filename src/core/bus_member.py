@@ -1,6 +1,8 @@
 import abc
 
 class BusMember(abc.ABC):
+    __slots__ = ()
+
     @abc.abstractmethod
     def read(self, loc: int) -> int:
         return 0
@@ -13,6 +15,10 @@ class BusMember(abc.ABC):
     def dma_transfer(self, page:int, to: "BusMember") -> None:
         return
 
+    def dma_write(self, data: bytes) -> None:
+        for (loc, byte) in enumerate(data):
+            self.write(loc, byte)
+
     @abc.abstractmethod
     def nmi(self) -> None:
         return
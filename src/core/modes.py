@@ -1,6 +1,6 @@
 import enum
 
-class AddressingMode(enum.Enum):
+class AddressingMode(enum.IntEnum):
     ABS = 0
     ABSIX = 1
     ABSX = 2
@@ -19,3 +19,25 @@ class AddressingMode(enum.Enum):
     ZPIY = 15
     REL = 16
     IND = 17
+
+# Plain int aliases of the members above. The opcode bodies compare the
+# raw mode byte against these on every instruction, which skips the enum
+# class attribute lookup.
+ABS = AddressingMode.ABS.value
+ABSIX = AddressingMode.ABSIX.value
+ABSX = AddressingMode.ABSX.value
+ABSY = AddressingMode.ABSY.value
+ABSI = AddressingMode.ABSI.value
+ACC = AddressingMode.ACC.value
+IMM = AddressingMode.IMM.value
+IMPLIED = AddressingMode.IMPLIED.value
+PCR = AddressingMode.PCR.value
+STACK = AddressingMode.STACK.value
+ZP = AddressingMode.ZP.value
+ZPIX = AddressingMode.ZPIX.value
+ZPX = AddressingMode.ZPX.value
+ZPY = AddressingMode.ZPY.value
+ZPI = AddressingMode.ZPI.value
+ZPIY = AddressingMode.ZPIY.value
+REL = AddressingMode.REL.value
+IND = AddressingMode.IND.value
@@ -1,23 +1,113 @@
-import time
 import traceback
 
-from typing import Optional, Tuple
+from typing import Tuple
 from io import BufferedReader
 
 from core.bus_member import BusMember
 from core.bus import Bus
-from core.modes import AddressingMode
-from exc.core import IllegalAddressingMode, EndOfExecution, ReturnFromInterrupt
+from core.modes import (
+    AddressingMode,
+    ABS,
+    ABSX,
+    ABSY,
+    ACC,
+    IMM,
+    IND,
+    ZP,
+    ZPIX,
+    ZPIY,
+    ZPX,
+    ZPY
+)
+from exc.core import IllegalAddressingMode
 from memory.ram import RAM
 from memory.stack import Stack
 from registers.pc import ProgramCounter
 from registers.status import FlagRegister
 from utils.sign import to_8bit_signed
 
+# Addressing modes accepted by each group of opcodes.
+_ALU_MODES = frozenset((ABS, ZP, IMM, ABSX, ABSY, ZPIX, ZPIY, ZPX))
+_BIT_MODES = frozenset((ABS, ZP))
+_CPXY_MODES = frozenset((ABS, ZP, IMM))
+_JMP_MODES = frozenset((ABS, IND))
+_LDX_MODES = frozenset((ABS, ZP, IMM, ABSY, ZPY))
+_LDY_MODES = frozenset((IMM, ZP, ABS, ZPX, ABSX))
+_RMW_MODES = frozenset((ABS, ZP, ABSX, ZPX))
+_SHIFT_MODES = frozenset((ACC, ABS, ZP, ABSX, ZPX))
+_STA_MODES = frozenset((ABS, ZP, ABSX, ABSY, ZPIX, ZPIY, ZPX))
+_STX_MODES = frozenset((ABS, ZP, ZPY))
+_STY_MODES = frozenset((ABS, ZP, ZPX))
+
+# Checked once against the opcode table when the MPU is built, so the
+# handlers themselves never validate their mode.
+_LEGAL_MODES = {
+    '_adc': _ALU_MODES,
+    '_and': _ALU_MODES,
+    '_asl': _SHIFT_MODES,
+    '_bit': _BIT_MODES,
+    '_cmp': _ALU_MODES,
+    '_cpx': _CPXY_MODES,
+    '_cpy': _CPXY_MODES,
+    '_dec': _RMW_MODES,
+    '_eor': _ALU_MODES,
+    '_inc': _RMW_MODES,
+    '_jmp': _JMP_MODES,
+    '_jsr': frozenset((ABS,)),
+    '_lda': _ALU_MODES,
+    '_ldx': _LDX_MODES,
+    '_ldy': _LDY_MODES,
+    '_lsr': _SHIFT_MODES,
+    '_ora': _ALU_MODES,
+    '_rol': _SHIFT_MODES,
+    '_ror': _SHIFT_MODES,
+    '_sbc': _ALU_MODES,
+    '_sta': _STA_MODES,
+    '_stx': _STX_MODES,
+    '_sty': _STY_MODES,
+}
+
+# Branch displacement for each operand byte.
+_SIGNED_BYTE = tuple(to_8bit_signed(b) for b in range(256))
+
+# N, Z and C for a compare of register value r against operand d, indexed
+# by (r << 8) | d.
+_CMP_FLAGS = bytes(
+    (((r - d) & 0x80) | ((r == d) << 1) | (r >= d))
+    for r in range(256) for d in range(256)
+)
+
 class MPU(BusMember):
+    # _a, _x and _y always hold 0..255; every writer narrows before storing,
+    # so readers never need to mask them again.
+    __slots__ = (
+        'trace',
+        'trace_file',
+        'step',
+        '_pc',
+        '_a',
+        '_x',
+        '_y',
+        '_flags',
+        '_ram',
+        '_stack',
+        'bus',
+        '_read',
+        '_write',
+        '_instruction_count',
+        '_lookup_table',
+        '_opcode_handlers',
+        '_opcode_modes',
+        '_data_fns',
+        '_mode_fns',
+        '_addr_fns',
+        '_mode_tables',
+        '_op_tables'
+    )
 
     def __init__(self):
         self.trace = False
+        self.trace_file = None
         self.step = False
 
         self._pc = ProgramCounter()
@@ -36,7 +126,7 @@ class MPU(BusMember):
             #0
             [
                 (self._brk, AddressingMode.IMPLIED),
-                (self._ora, AddressingMode.ABSIX),
+                (self._ora, AddressingMode.ZPIX),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -54,7 +144,7 @@ class MPU(BusMember):
             ],
             #1
             [
-                (self._bpl, AddressingMode.REL),
+                (self._branch(0x80, 0x00), AddressingMode.REL),
                 (self._ora, AddressingMode.ZPIY),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -74,7 +164,7 @@ class MPU(BusMember):
             #2
             [
                 (self._jsr, AddressingMode.ABS),
-                (self._and, AddressingMode.ABSIX),
+                (self._and, AddressingMode.ZPIX),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._bit, AddressingMode.ZP),
@@ -92,7 +182,7 @@ class MPU(BusMember):
             ],
             #3
             [
-                (self._bmi, AddressingMode.REL),
+                (self._branch(0x80, 0x80), AddressingMode.REL),
                 (self._and, AddressingMode.ZPIY),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -112,7 +202,7 @@ class MPU(BusMember):
             #4
             [
                 (self._rti, AddressingMode.IMPLIED),
-                (self._eor, AddressingMode.ABSIX),
+                (self._eor, AddressingMode.ZPIX),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -130,7 +220,7 @@ class MPU(BusMember):
             ],
             #5
             [
-                (self._bvc, AddressingMode.REL),
+                (self._branch(0x40, 0x00), AddressingMode.REL),
                 (self._eor, AddressingMode.ZPIY),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -150,7 +240,7 @@ class MPU(BusMember):
             #6
             [
                 (self._rts, AddressingMode.IMPLIED),
-                (self._adc, AddressingMode.ABSIX),
+                (self._adc, AddressingMode.ZPIX),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -168,7 +258,7 @@ class MPU(BusMember):
             ],
             #7
             [
-                (self._bvs, AddressingMode.REL),
+                (self._branch(0x40, 0x40), AddressingMode.REL),
                 (self._adc, AddressingMode.ZPIY),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -206,7 +296,7 @@ class MPU(BusMember):
             ],
             #9
             [
-                (self._bcc, AddressingMode.REL),
+                (self._branch(0x01, 0x00), AddressingMode.REL),
                 (self._sta, AddressingMode.ZPIY),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -244,7 +334,7 @@ class MPU(BusMember):
             ],
             #B
             [
-                (self._bcs, AddressingMode.REL),
+                (self._branch(0x01, 0x01), AddressingMode.REL),
                 (self._lda, AddressingMode.ZPIY),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -282,7 +372,7 @@ class MPU(BusMember):
             ],
             #D
             [
-                (self._bne, AddressingMode.REL),
+                (self._branch(0x02, 0x00), AddressingMode.REL),
                 (self._cmp, AddressingMode.ZPIY),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -320,7 +410,7 @@ class MPU(BusMember):
             ],
             #F
             [
-                (self._beq, AddressingMode.REL),
+                (self._branch(0x02, 0x02), AddressingMode.REL),
                 (self._sbc, AddressingMode.ZPIY),
                 (self._nop, AddressingMode.IMPLIED),
                 (self._nop, AddressingMode.IMPLIED),
@@ -339,1129 +429,749 @@ class MPU(BusMember):
             ]
         ]
 
+        # Flatten the table above into two parallel, opcode-indexed
+        # sequences so a dispatch is one tuple index plus one byte index.
+        opcodes = [entry for table in self._lookup_table for entry in table]
+        self._opcode_handlers = tuple(op for (op, _) in opcodes)
+        self._opcode_modes = bytes(mode for (_, mode) in opcodes)
+
+        # Every opcode has a handler, so run() can dispatch without
+        # checking for holes in the table.
+        if len(opcodes) != 256 or None in self._opcode_handlers:
+            raise RuntimeError("opcode table must cover all 256 opcodes")
+
+        for (op, mode) in opcodes:
+            legal = _LEGAL_MODES.get(op.__name__)
+            if legal is not None and mode not in legal:
+                raise IllegalAddressingMode(f"{op.__name__[1:].upper()} {AddressingMode(mode).name}")
+
+        # Addressing-mode helpers indexed by the mode byte. The data table
+        # resolves only the operand for loads, ALU ops and compares, the
+        # mode table resolves (data, addr) for read-modify-write ops and the
+        # address table resolves only the target address for stores and
+        # jumps. run() picks the plain or the traced set.
+        data_fns = [None] * len(AddressingMode)
+        data_fns[ABS] = self._data_abs
+        data_fns[ABSX] = self._data_absx
+        data_fns[ABSY] = self._data_absy
+        data_fns[IMM] = self._data_imm
+        data_fns[ZP] = self._data_zp
+        data_fns[ZPIX] = self._data_zpix
+        data_fns[ZPIY] = self._data_zpiy
+        data_fns[ZPX] = self._data_zpx
+        data_fns[ZPY] = self._data_zpy
+        data_fns = tuple(data_fns)
+
+        mode_fns = [None] * len(AddressingMode)
+        mode_fns[ABS] = self._mode_abs
+        mode_fns[ABSX] = self._mode_absx
+        mode_fns[ACC] = self._mode_acc
+        mode_fns[ZP] = self._mode_zp
+        mode_fns[ZPX] = self._mode_zpx
+        mode_fns = tuple(mode_fns)
+
+        addr_fns = [None] * len(AddressingMode)
+        addr_fns[ABS] = self._addr_fetch
+        addr_fns[ABSX] = self._addr_absx
+        addr_fns[ABSY] = self._addr_absy
+        addr_fns[IND] = self._addr_ind
+        addr_fns[ZP] = self._zpage_addr_fetch
+        addr_fns[ZPIX] = self._addr_zpix
+        addr_fns[ZPIY] = self._addr_zpiy
+        addr_fns[ZPX] = self._addr_zpx
+        addr_fns[ZPY] = self._addr_zpy
+        addr_fns = tuple(addr_fns)
+
+        self._mode_tables = (
+            (data_fns, mode_fns, addr_fns),
+            (
+                tuple(self._trace_data(fn) for fn in data_fns),
+                tuple(self._trace_mode(fn) for fn in mode_fns),
+                tuple(self._trace_addr(fn) for fn in addr_fns)
+            )
+        )
+        (self._data_fns, self._mode_fns, self._addr_fns) = self._mode_tables[0]
+
+        self._op_tables = (
+            self._opcode_handlers,
+            tuple(self._trace_op(opcode, op) for (opcode, op) in enumerate(self._opcode_handlers))
+        )
+
     def set_bus(self, bus: Bus):
         self.bus = bus
-
-    def _adc(self, mode: AddressingMode):
-        data = 0
-        if mode == AddressingMode.ABSIX:
-            (data, _) = self._mode_absix()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.IMM:
-            (data, _) = self._mode_imm()
-        elif mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZPIY:
-            (data, _) = self._mode_zpiy()
-        elif mode == AddressingMode.ZPX:
-            (data, _) = self._mode_zpx()
-        elif mode == AddressingMode.ABSY:
-            (data, _) = self._mode_absy()
-        elif mode == AddressingMode.ABSX:
-            (data, _) = self._mode_absx()
+        self._read = self._bus_read
+        self._write = self._bus_write
+
+    # Only the PPU registers (and their mirrors) and the APU/IO block are
+    # memory mapped, everything else is plain RAM or PRG-ROM and never needs
+    # to go through the bus. Callers always pass an already wrapped 16-bit
+    # address.
+    def _bus_read(self, loc: int) -> int:
+        if 0x2000 <= loc <= 0x401F:
+            return self.bus.read(loc)
+        return self._ram.store[loc]
+
+    def _bus_write(self, loc: int, data: int) -> None:
+        if 0x2000 <= loc <= 0x401F:
+            self.bus.write(loc, data)
         else:
-            raise IllegalAddressingMode(f"ADC {mode.name}")
+            self._ram.store[loc] = data
 
-        if data is None:
-            raise RuntimeError("ADC data is None")
-
-        if self.trace:
-            print(f"\tpre-acc: {self._a:04x}")
+    def _adc(self, mode: AddressingMode):
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        result = self._a + data + self._flags.carry
+        result = self._a + data + (flags.reg & 0x01)
+        value = result & 0xFF
 
-        self._flags.update_carry(self._a)
-        self._flags.update_sign(self._a)
-        self._flags.update_zero(self._a)
-        self._flags.update_overflow(result, self._a, data)
+        flags.reg = (
+            (flags.reg & 0x3C)
+            | (value & 0x80)
+            | (((result ^ data) & (result ^ self._a) & 0x80) >> 1)
+            | ((value == 0) << 1)
+            | (result >> 8)
+        )
 
-        self._a = result & 0xFF
-        if self.trace:
-            print(f"\tacc: {self._a:04x}")
+        self._a = value
 
     def _and(self, mode: AddressingMode):
-        data = 0
-        if mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.IMM:
-            (data, _) = self._mode_imm()
-        elif mode == AddressingMode.ABSX:
-            (data, _) = self._mode_absx()
-        elif mode == AddressingMode.ABSY:
-            (data, _) = self._mode_absy()
-        elif mode == AddressingMode.ZPIX:
-            (data, _) = self._mode_zpix()
-        elif mode == AddressingMode.ZPIY:
-            (data, _) = self._mode_zpiy()
-        elif mode == AddressingMode.ZPX:
-            (data, _) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"AND {mode.name}")
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        if data is None:
-            raise Exception("AND data cannot be None")
-
-        self._a = (self._a & data) & 0xFF
-        self._flags.update_sign(self._a)
-        self._flags.update_zero(self._a)
+        self._a = self._a & data
+        flags.reg = (flags.reg & 0x7D) | (self._a & 0x80) | ((self._a == 0) << 1)
 
     def _asl(self, mode: AddressingMode):
-        if mode == AddressingMode.ACC:
-            data = self._a
-            self._a = self.__shift_left(data)
-        elif mode == AddressingMode.ABS:
-            (data, addr) = self._mode_abs()
-            shifted = self.__shift_left(data)
-            self.bus.write(addr, shifted)
-        elif mode == AddressingMode.ZP:
-            (data, addr) = self._mode_zp()
-            shifted = self.__shift_left(data)
-            self.bus.write(addr, shifted)
-        elif mode == AddressingMode.ABSX:
-            (data, addr) = self._mode_absx()
-            shifted = self.__shift_left(data)
-            self.bus.write(addr, shifted)
-        elif mode == AddressingMode.ZPX:
-            (data, addr) = self._mode_zpx()
-            shifted = self.__shift_left(data)
-            self.bus.write(addr, data)
-        else:
-            raise IllegalAddressingMode(f"ASL {mode.name}")
+        flags = self._flags
+        (data, addr) = self._mode_fns[mode]()
 
-    def __shift_left(self, data):
-        shifted = data << 1
-        if (0xFF00 & shifted):
-            self._flags.carry = 1
-        else:
-            self._flags.carry = 0
-        shifted &= 0xFF
-        self._flags.update_zero(shifted)
-        self._flags.update_sign(shifted)
-        return shifted
-
-    def _bcc(self, mode: AddressingMode):
-        if mode != AddressingMode.REL:
-            raise IllegalAddressingMode(f"BCC {mode.name}")
-
-        displacement = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        if self._flags.carry == 0:
-            self._pc.displace_pc(to_8bit_signed(displacement))
-
-    def _bcs(self, mode: AddressingMode):
-        if mode != AddressingMode.REL:
-            raise IllegalAddressingMode(f"BCS {mode.name}")
-
-        displacement = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        if self._flags.carry == 1:
-            self._pc.displace_pc(to_8bit_signed(displacement))
-            if self.trace:
-                print(f"\tbranching to: {self._pc.reg:04x}")
-
-    def _beq(self, mode: AddressingMode):
-        if mode != AddressingMode.REL:
-            raise IllegalAddressingMode(f"BEQ {mode.name}")
-
-        displacement = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        if self._flags.zero == 1:
-            self._pc.displace_pc(to_8bit_signed(displacement))
+        result = (data << 1) & 0xFF
+        flags.reg = (flags.reg & 0x7C) | (result & 0x80) | ((result == 0) << 1) | (data >> 7)
 
-    def _bit(self, mode: AddressingMode):
-        if mode == mode.ABS:
-            (data, addr) = self._mode_abs()
-        elif mode == mode.ZP:
-            (data, addr) = self._mode_zp()
+        if addr is None:
+            self._a = result
         else:
-            raise IllegalAddressingMode(f"BIT {mode.name}")
-
-        if data is None:
-            raise Exception("data cannot be None")
-
-        self._flags.overflow = (data & 0x40) >> 6
-        self._flags.sign = (data & 0x80) >> 7
-
-        result = (self._a & data) & 0xFF
-        self._flags.update_zero(result)
+            self._write(addr, result)
 
-    def _bmi(self, mode: AddressingMode):
-        if mode != AddressingMode.REL:
-            raise IllegalAddressingMode(f"BMI {mode.name}")
+    def _branch(self, mask: int, taken: int):
+        def branch(mode: AddressingMode):
+            pc = self._pc
+            loc = pc.reg
+            displacement = self._ram.store[loc] if loc >= 0x8000 else self._read(loc)
+            loc = (loc + 1) & 0xFFFF
+            if (self._flags.reg & mask) == taken:
+                loc = (loc + _SIGNED_BYTE[displacement]) & 0xFFFF
+            pc.reg = loc
 
-        displacement = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        if self._flags.sign == 1:
-            self._pc.displace_pc(to_8bit_signed(displacement))
+        return branch
 
-    def _bne(self, mode: AddressingMode):
-        if mode != AddressingMode.REL:
-            raise IllegalAddressingMode(f"BNE {mode.name}")
-
-        displacement = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        if self._flags.zero == 0:
-            self._pc.displace_pc(to_8bit_signed(displacement))
-            if self.trace:
-                print(f"\tbranching to: {self._pc.reg:04x}")
-
-    def _bpl(self, mode: AddressingMode):
-        if mode != AddressingMode.REL:
-            raise IllegalAddressingMode(f"BPL {mode.name}")
+    def _bit(self, mode: AddressingMode):
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        displacement = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        if self._flags.sign == 0:
-            self._pc.displace_pc(to_8bit_signed(displacement))
+        result = self._a & data
+        flags.reg = (flags.reg & 0x3D) | (data & 0xC0) | ((result == 0) << 1)
 
     def _brk(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"BRK {mode.name}")
-
-        self._pc.reg += 2
-        self._stack.push(self._pc.pc_hi())
-        self._stack.push(self._pc.pc_lo())
-        self._pc.reg -= 2
-        self._stack.push(self._flags.to_int())
-
-        self._pc.set_pc_lo(self.bus.read(0xFFFE))
-        self._pc.set_pc_hi(self.bus.read(0xFFFF))
-
-    def _bvc(self, mode: AddressingMode):
-        if mode != AddressingMode.REL:
-            raise IllegalAddressingMode(f"BVC {mode.name}")
-
-        displacement = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        if self._flags.overflow == 0:
-            self._pc.displace_pc(to_8bit_signed(displacement))
-
-    def _bvs(self, mode: AddressingMode):
-        if mode != AddressingMode.REL:
-            raise IllegalAddressingMode(f"BVS {mode.name}")
-
-        displacement = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        if self._flags.overflow == 1:
-            self._pc.displace_pc(to_8bit_signed(displacement))
+        pc = self._pc
+        ret = (pc.reg + 2) & 0xFFFF
+        stack = self._stack
+        store = self._ram.store
+        sp = stack._sp
+        store[sp] = ret >> 8
+        store[0x100 | ((sp - 1) & 0xFF)] = ret & 0xFF
+        store[0x100 | ((sp - 2) & 0xFF)] = self._flags.reg | 0x30
+        stack._sp = 0x100 | ((sp - 3) & 0xFF)
+
+        pc.reg = (store[0xFFFF] << 8) | store[0xFFFE]
 
     def _clc(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"CLC {mode.name}")
-
-        self._flags.carry = 0
+        self._flags.reg &= 0xFE
 
     def _cld(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"CLD {mode.name}")
-
-        self._flags.decimal = 0
+        self._flags.reg &= 0xF7
 
     def _cli(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"CLI {mode.name}")
-
-        self._flags.interrupt = 0
+        self._flags.reg &= 0xFB
 
     def _clv(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"CLV {mode.name}")
-
-        self._flags.overflow = 0
+        self._flags.reg &= 0xBF
 
     def _cmp(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.IMM:
-            (data, _) = self._mode_imm()
-        elif mode == AddressingMode.ABSX:
-            (data, _) = self._mode_absx()
-        elif mode == AddressingMode.ABSY:
-            (data, _) = self._mode_absy()
-        elif mode == AddressingMode.ZPIX:
-            (data, _) = self._mode_zpix()
-        elif mode == AddressingMode.ZPIY:
-            (data, _) = self._mode_zpiy()
-        elif mode == AddressingMode.ZPX:
-            (data, _) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"CMP {mode.name}")
-
-        if data is None:
-            raise Exception("data cannot be None")
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        result = (self._a - data)
-        if (result & 0xFF) == 0:
-            self._flags.zero = 1
-        else:
-            self._flags.zero = 0
-
-        if (result & 0xFF) & 0x80 == 0x80:
-            self._flags.sign = 1
-        else:
-            self._flags.sign = 0
-
-        if (result & 0xFF00) != 0:
-            self._flags.carry = 1
-        else:
-            self._flags.carry = 0
+        flags.reg = (flags.reg & 0x7C) | _CMP_FLAGS[(self._a << 8) | data]
 
     def _cpx(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.IMM:
-            (data, _) = self._mode_imm()
-        else:
-            raise IllegalAddressingMode(f"CPX {mode.name}")
-
-        if data is None:
-            raise Exception("data cannot be None")
-
-        result = (self._x - data)
-        if (result & 0xFF) == 0:
-            self._flags.zero = 1
-        else:
-            self._flags.zero = 0
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        if result & 0x80 == 0x80:
-            self._flags.sign = 1
-        else:
-            self._flags.sign = 0
-
-        if (result & 0xFF00) != 0:
-            self._flags.carry = 1
-        else:
-            self._flags.carry = 0
+        flags.reg = (flags.reg & 0x7C) | _CMP_FLAGS[(self._x << 8) | data]
 
     def _cpy(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.IMM:
-            (data, _) = self._mode_imm()
-        else:
-            raise IllegalAddressingMode(f"CPX {mode.name}")
-
-        if data is None:
-            raise Exception("data cannot be None")
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        result = (self._y - data)
-        if (result & 0xFF) == 0:
-            self._flags.zero = 1
-        else:
-            self._flags.zero = 0
-
-        if (result & 0x80) == 0x80:
-            self._flags.sign = 1
-        else:
-            self._flags.sign = 0
-
-        if (result & 0xFF00) != 0:
-            self._flags.carry = 1
-        else:
-            self._flags.carry = 0
+        flags.reg = (flags.reg & 0x7C) | _CMP_FLAGS[(self._y << 8) | data]
 
     def _dec(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (data, addr) = self._mode_abs()
-        elif mode == AddressingMode.ABSX:
-            (data, addr) = self._mode_absx()
-        elif mode == AddressingMode.ZP:
-            (data, addr) = self._mode_zp()
-        elif mode == AddressingMode.ZPX:
-            (data, addr) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"DEC {mode.name}")
+        flags = self._flags
+        (data, addr) = self._mode_fns[mode]()
 
         if data is None:
             raise Exception("data cannot be None")
 
         result = (data - 1) & 0xFF
-        self.bus.write(addr, result)
+        self._write(addr, result)
 
-        self._flags.update_sign(result)
-        self._flags.update_zero(result)
+        flags.reg = (flags.reg & 0x7D) | (result & 0x80) | ((result == 0) << 1)
 
     def _dex(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"DEX {mode.name}")
-
+        flags = self._flags
         self._x = (self._x - 1) & 0xFF
 
-        if self.trace:
-            print(f"\tval: {self._x:02x}", file=self.trace_file)
-
-        self._flags.update_sign(self._x)
-        self._flags.update_zero(self._x)
+        flags.reg = (flags.reg & 0x7D) | (self._x & 0x80) | ((self._x == 0) << 1)
 
     def _dey(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"DEY {mode.name}")
-
+        flags = self._flags
         self._y = (self._y - 1) & 0xFF
 
-        if self.trace:
-            print(f"\tval: {self._y:02x}", file=self.trace_file)
-
-        self._flags.update_sign(self._y)
-        self._flags.update_zero(self._y)
+        flags.reg = (flags.reg & 0x7D) | (self._y & 0x80) | ((self._y == 0) << 1)
 
     def _eor(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.IMM:
-            data = self._data_fetch()
-        elif mode == AddressingMode.ABSX:
-            (data, _) = self._mode_absx()
-        elif mode == AddressingMode.ABSY:
-            (data, _) = self._mode_absy()
-        elif mode == AddressingMode.ZPIX:
-            (data, _) = self._mode_zpix()
-        elif mode == AddressingMode.ZPIY:
-            (data, _) = self._mode_zpiy()
-        elif mode == AddressingMode.ZPX:
-            (data, _) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"EOR {mode.name}")
-
-        if data is None:
-            raise Exception("data cannot be None")
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        self._a = (self._a ^ data) & 0xFF
+        self._a = self._a ^ data
 
-        self._flags.update_sign(self._a)
-        self._flags.update_zero(self._a)
+        flags.reg = (flags.reg & 0x7D) | (self._a & 0x80) | ((self._a == 0) << 1)
 
 
     def _inc(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (data, addr) = self._mode_abs()
-        elif mode == AddressingMode.ABSX:
-            (data, addr) = self._mode_absx()
-        elif mode == AddressingMode.ZP:
-            (data, addr) = self._mode_zp()
-        elif mode == AddressingMode.ZPX:
-            (data, addr) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"INC {mode.name}")
+        flags = self._flags
+        (data, addr) = self._mode_fns[mode]()
 
         if data is None:
             raise Exception("data cannot be None")
 
         result = (data + 1) & 0xFF
-        self.bus.write(addr, result)
+        self._write(addr, result)
 
-        self._flags.update_sign(result)
-        self._flags.update_zero(result)
+        flags.reg = (flags.reg & 0x7D) | (result & 0x80) | ((result == 0) << 1)
 
     def _inx(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"INX {mode.name}")
-
+        flags = self._flags
         self._x = (self._x + 1) & 0xFF
 
-        if self.trace:
-            print(f"\tval: {self._x:02x}", file=self.trace_file)
-
-        self._flags.update_sign(self._x)
-        self._flags.update_zero(self._x)
+        flags.reg = (flags.reg & 0x7D) | (self._x & 0x80) | ((self._x == 0) << 1)
 
     def _iny(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"INY {mode.name}")
-
+        flags = self._flags
         self._y = (self._y + 1) & 0xFF
 
-        if self.trace:
-            print(f"\tval: {self._y:02x}", file=self.trace_file)
-
-        self._flags.update_sign(self._y)
-        self._flags.update_zero(self._y)
+        flags.reg = (flags.reg & 0x7D) | (self._y & 0x80) | ((self._y == 0) << 1)
 
     def _jmp(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (_, addr) = self._mode_abs(data_fetch=False)
-        elif mode == AddressingMode.IND:
-            (_, addr) = self._mode_ind()
-        else:
-            raise IllegalAddressingMode(f"JMP {mode.name}")
-
+        addr = self._addr_fns[mode]()
         self._pc.reg = addr
 
     def _jsr(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (_, addr) = self._mode_abs(data_fetch=False)
-        else:
-            raise IllegalAddressingMode(f"JSR {mode.name}")
+        pc = self._pc
+        addr = self._addr_fns[mode]()
 
         # XXX We've advanced past the OP code,
         #     and past the address onto the next OP code.
         #     When we return we'll be adding 1 to the PC.
         #     So we subtract 1 here so we land on the next
         #     OP code.
-        self._pc.reg -= 1
-        self._stack.push(self._pc.pc_hi())
-        self._stack.push(self._pc.pc_lo())
-        self._pc.reg = addr
-
-        self.trace = False
+        ret = (pc.reg - 1) & 0xFFFF
+        stack = self._stack
+        store = self._ram.store
+        sp = stack._sp
+        store[sp] = ret >> 8
+        store[0x100 | ((sp - 1) & 0xFF)] = ret & 0xFF
+        stack._sp = 0x100 | ((sp - 2) & 0xFF)
+        pc.reg = addr
 
     def _lda(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.IMM:
-            (data, _) = self._mode_imm()
-        elif mode == AddressingMode.ABSX:
-            (data, _) = self._mode_absx()
-        elif mode == AddressingMode.ABSY:
-            (data, _) = self._mode_absy()
-        elif mode == AddressingMode.ZPIX:
-            (data, _) = self._mode_zpix()
-        elif mode == AddressingMode.ZPIY:
-            (data, _) = self._mode_zpiy()
-        elif mode == AddressingMode.ZPX:
-            (data, _) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"LDA {mode.name}")
-
-        if data is None:
-            raise Exception("data cannot be None")
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        self._a = data & 0xFF
+        self._a = data
 
-        self._flags.update_sign(self._a)
-        self._flags.update_zero(self._a)
+        flags.reg = (flags.reg & 0x7D) | (self._a & 0x80) | ((self._a == 0) << 1)
 
     def _ldx(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.IMM:
-            (data, _) = self._mode_imm()
-        elif mode == AddressingMode.ABSY:
-            (data, _) = self._mode_absy()
-        elif mode == AddressingMode.ZPY:
-            (data, _) = self._mode_zpy()
-        else:
-            raise IllegalAddressingMode(f"LDX {mode.name}")
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        if data is None:
-            raise Exception("data cannot be None")
-
-        self._x = data & 0xFF
+        self._x = data
 
-        self._flags.update_sign(self._x)
-        self._flags.update_zero(self._x)
+        flags.reg = (flags.reg & 0x7D) | (self._x & 0x80) | ((self._x == 0) << 1)
 
     def _ldy(self, mode: AddressingMode):
-        if mode == AddressingMode.IMM:
-            (data, _) = self._mode_imm()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZPX:
-            (data, _) = self._mode_zpx()
-        elif mode == AddressingMode.ABSX:
-            (data, _) = self._mode_absx()
-        else:
-            raise IllegalAddressingMode(f"LDY {mode.name}")
-
-        if data is None:
-            raise Exception("data cannot be None")
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        self._y = data & 0xFF
+        self._y = data
 
-        self._flags.update_sign(self._y)
-        self._flags.update_zero(self._y)
+        flags.reg = (flags.reg & 0x7D) | (self._y & 0x80) | ((self._y == 0) << 1)
 
     def _lsr(self, mode: AddressingMode):
-        if mode == AddressingMode.ACC:
-            data = self._a
-            addr = None
-        elif mode == AddressingMode.ABS:
-            (data, addr) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, addr) = self._mode_zp()
-        elif mode == AddressingMode.ABSX:
-            (data, addr) = self._mode_absx()
-        elif mode == AddressingMode.ZPX:
-            (data, addr) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"LSR {mode.name}")
+        flags = self._flags
+        (data, addr) = self._mode_fns[mode]()
 
         if data is None:
             raise Exception("data cannot be None")
 
-        self._flags.update_carry(data, bit_high=False)
-        data = data >> 1
-        self._flags.update_sign(data)
-        self._flags.update_zero(data)
+        result = data >> 1
+        flags.reg = (flags.reg & 0x7C) | ((result == 0) << 1) | (data & 0x01)
 
-        if addr is not None:
-            self.bus.write(addr, data & 0xFF)
+        if addr is None:
+            self._a = result
         else:
-            self._a = data & 0xFF
+            self._write(addr, result)
 
     def _nop(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"NOP {mode.name}")
+        pass
 
     def _ora(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.IMM:
-            (data, _) = self._mode_imm()
-        elif mode == AddressingMode.ABSX:
-            (data, _) = self._mode_absx()
-        elif mode == AddressingMode.ABSY:
-            (data, _) = self._mode_absy()
-        elif mode == AddressingMode.ZPIX:
-            (data, _) = self._mode_zpix()
-        elif mode == AddressingMode.ZPIY:
-            (data, _) = self._mode_zpiy()
-        elif mode == AddressingMode.ZPX:
-            (data, _) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"ORA {mode.name}")
-
-        if data is None:
-            raise Exception("data cannot be None")
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        self._a = (self._a | data) & 0xFF
+        self._a = self._a | data
 
-        self._flags.update_sign(self._a)
-        self._flags.update_zero(self._a)
+        flags.reg = (flags.reg & 0x7D) | (self._a & 0x80) | ((self._a == 0) << 1)
 
     def _pha(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"PHA {mode.name}")
-
-        self._stack.push(self._a & 0xFF)
+        stack = self._stack
+        sp = stack._sp
+        self._ram.store[sp] = self._a
+        stack._sp = 0x100 | ((sp - 1) & 0xFF)
 
     def _php(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"PHP {mode.name}")
-
-        self._flags.break_ = 1
-        self._flags.unused = 1
-        self._stack.push(self._flags.to_int() & 0xFF)
-        self._flags.break_ = 0
-        self._flags.unused = 0
+        flags = self._flags
+        stack = self._stack
+        sp = stack._sp
+        self._ram.store[sp] = flags.reg | 0x30
+        stack._sp = 0x100 | ((sp - 1) & 0xFF)
+        flags.reg &= 0xCF
 
     def _pla(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"PLA {mode.name}")
-
-        self._a = self._stack.pop() & 0xFF
+        flags = self._flags
+        stack = self._stack
+        sp = 0x100 | ((stack._sp + 1) & 0xFF)
+        stack._sp = sp
+        self._a = self._ram.store[sp]
 
-        self._flags.update_sign(self._a)
-        self._flags.update_zero(self._a)
+        flags.reg = (flags.reg & 0x7D) | (self._a & 0x80) | ((self._a == 0) << 1)
 
     def _plp(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"PLP {mode.name}")
-
-        self._flags.update_flags(self._stack.pop() & 0xFF)
+        stack = self._stack
+        sp = 0x100 | ((stack._sp + 1) & 0xFF)
+        stack._sp = sp
+        self._flags.reg = self._ram.store[sp]
 
     def _rol(self, mode: AddressingMode):
-        if mode == AddressingMode.ACC:
-            data = self._a
-            addr = None
-        elif mode == AddressingMode.ABS:
-            (data, addr) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, addr) = self._mode_zp()
-        elif mode == AddressingMode.ABSX:
-            (data, addr) = self._mode_absx()
-        elif mode == AddressingMode.ZPX:
-            (data, addr) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"ROL {mode.name}")
+        flags = self._flags
+        (data, addr) = self._mode_fns[mode]()
 
         if data is None:
             raise Exception("data cannot be None")
 
-        current_carry = self._flags.carry
-        data = (data << 1)
-        data |= current_carry
-        self._flags.update_carry(data)
-        self._flags.update_zero(data)
-        self._flags.update_sign(data)
+        data = (data << 1) | (flags.reg & 0x01)
+        result = data & 0xFF
+        flags.reg = (flags.reg & 0x7C) | (result & 0x80) | ((result == 0) << 1) | (data >> 8)
 
-        if addr is not None:
-            self.bus.write(addr, data & 0xFF)
+        if addr is None:
+            self._a = result
         else:
-            self._a = data & 0xFF
-
+            self._write(addr, result)
 
     def _ror(self, mode: AddressingMode):
-        if mode == AddressingMode.ACC:
-            data = self._a
-            addr = None
-        elif mode == AddressingMode.ABS:
-            (data, addr) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, addr) = self._mode_zp()
-        elif mode == AddressingMode.ABSX:
-            (data, addr) = self._mode_absx()
-        elif mode == AddressingMode.ZPX:
-            (data, addr) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"ROR {mode.name}")
+        flags = self._flags
+        (data, addr) = self._mode_fns[mode]()
 
         if data is None:
             raise Exception("data cannot be None")
 
-        current_carry = self._flags.carry
-        data = (0xFF & data) >> 1
-        data |= (current_carry & 0x01) << 7
-        self._flags.update_carry(data, bit_high=False)
-        self._flags.update_zero(data)
-        self._flags.update_sign(data)
+        result = (data >> 1) | ((flags.reg & 0x01) << 7)
+        flags.reg = (flags.reg & 0x7C) | (result & 0x80) | ((result == 0) << 1) | (data & 0x01)
 
-        if addr is not None:
-            self.bus.write(addr, data & 0xFF)
+        if addr is None:
+            self._a = result
         else:
-            self._a = data & 0xFF
+            self._write(addr, result)
 
     def _rti(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"RTI {mode.name}")
-
-        self._flags.update_flags(self._stack.pop())
-        self._pc.set_pc_lo(self._stack.pop())
-        self._pc.set_pc_hi(self._stack.pop())
-        raise ReturnFromInterrupt()
+        stack = self._stack
+        store = self._ram.store
+        sp = stack._sp
+        self._flags.reg = store[0x100 | ((sp + 1) & 0xFF)]
+        pc_lo = store[0x100 | ((sp + 2) & 0xFF)]
+        sp = 0x100 | ((sp + 3) & 0xFF)
+        pc_hi = store[sp]
+        stack._sp = sp
+        self._pc.reg = (pc_hi << 8) | pc_lo
+        return True
 
     def _rts(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"RTS {mode.name}")
-
-        pc_lo = self._stack.pop()
-        self._pc.set_pc_lo(pc_lo)
-        pc_hi = self._stack.pop()
-        self._pc.set_pc_hi(pc_hi)
-        self._pc.advance_pc()
-
-        if self.trace:
-            print(f"\treturning: {self._pc.reg:04x}", file=self.trace_file)
+        pc = self._pc
+        stack = self._stack
+        store = self._ram.store
+        sp = stack._sp
+        pc_lo = store[0x100 | ((sp + 1) & 0xFF)]
+        sp = 0x100 | ((sp + 2) & 0xFF)
+        pc_hi = store[sp]
+        stack._sp = sp
+        pc.reg = (((pc_hi << 8) | pc_lo) + 1) & 0xFFFF
 
     def _sbc(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (data, _) = self._mode_abs()
-        elif mode == AddressingMode.ZP:
-            (data, _) = self._mode_zp()
-        elif mode == AddressingMode.IMM:
-            (data, _) = self._mode_imm()
-        elif mode == AddressingMode.ABSX:
-            (data, _) = self._mode_absx()
-        elif mode == AddressingMode.ABSY:
-            (data, _) = self._mode_absy()
-        elif mode == AddressingMode.ZPIX:
-            (data, _) = self._mode_zpix()
-        elif mode == AddressingMode.ZPIY:
-            (data, _) = self._mode_zpiy()
-        elif mode == AddressingMode.ZPX:
-            (data, _) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"SBC {mode.name}")
-
-        if data is None:
-            raise Exception("SBC data cannot be None")
+        flags = self._flags
+        data = self._data_fns[mode]()
 
-        if self.trace:
-            print(f"\tprev val:{self._a:04x}")
-            print(f"\tdata:{data:04x}")
-
-        result = ((self._a - data) - self._flags.carry)
-        if self.trace:
-            print(f"\tresult:{result:04x}")
+        # A - M - (1 - C) is A + ~M + C, so borrow comes out as a clear carry.
+        data ^= 0xFF
+        result = self._a + data + (flags.reg & 0x01)
+        value = result & 0xFF
 
-        self._flags.update_sign(result)
-        self._flags.update_overflow(result, self._a, data)
-        self._flags.update_zero(result)
-        if result & 0xFF00 != 0:
-            self._flags.carry = 1
-        else:
-            self._flags.carry = 0
+        flags.reg = (
+            (flags.reg & 0x3C)
+            | (value & 0x80)
+            | (((result ^ data) & (result ^ self._a) & 0x80) >> 1)
+            | ((value == 0) << 1)
+            | (result >> 8)
+        )
 
-        self._a = result & 0xFF
+        self._a = value
 
     def _sec(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"SEC {mode.name}")
-
-        self._flags.carry = 1
+        self._flags.reg |= 0x01
 
     def _sed(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"SED {mode.name}")
-
-        self._flags.decimal = 1
+        self._flags.reg |= 0x08
 
     def _sei(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"SEI {mode.name}")
-
-        self._flags.interrupt = 1
+        self._flags.reg |= 0x04
 
     def _sta(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (_, addr) = self._mode_abs(data_fetch=False)
-        elif mode == AddressingMode.ZP:
-            (_, addr) = self._mode_zp(data_fetch=False)
-        elif mode == AddressingMode.ABSX:
-            (_, addr) = self._mode_absx()
-        elif mode == AddressingMode.ABSY:
-            (_, addr) = self._mode_absy()
-        elif mode == AddressingMode.ZPIX:
-            (_, addr) = self._mode_zpix()
-        elif mode == AddressingMode.ZPIY:
-            (_, addr) = self._mode_zpiy()
-        elif mode == AddressingMode.ZPX:
-            (_, addr) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"STA {mode.name}")
+        addr = self._addr_fns[mode]()
 
-        if mode == AddressingMode.ZP:
-            self._ram.store[addr] = self._a & 0xFF
+        if mode == ZP:
+            self._ram.store[addr] = self._a
         else:
-            self.bus.write(addr, self._a & 0xFF)
-
-
-        if self.trace:
-            print(f"\tval: {self._a:04x}")
-
-        # if addr in range(0x50, 0x55):
-        #     input("WATCH")
-
-        # if addr not in self.bus.w_mmap:
-        #     assert (self._ram.store[addr] ==  self._a), f"{addr:04x} {self._ram.store[addr]:04x} != {self._a:04x}"
+            self._write(addr, self._a)
 
     def _stx(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (_, addr) = self._mode_abs(data_fetch=False)
-        elif mode == AddressingMode.ZP:
-            (_, addr) = self._mode_zp(data_fetch=False)
-        elif mode == AddressingMode.ZPY:
-            (_, addr) = self._mode_zpy()
-        else:
-            raise IllegalAddressingMode(f"STX {mode.name}")
+        addr = self._addr_fns[mode]()
 
-        self.bus.write(addr, self._x & 0xFF)
-        # if addr not in self.bus.w_mmap:
-        #     assert (self._ram.store[addr] ==  self._x), f"{addr:04x} {self._ram.store[addr]:04x} != {self._x:04x}"
+        self._write(addr, self._x)
 
     def _sty(self, mode: AddressingMode):
-        if mode == AddressingMode.ABS:
-            (_, addr) = self._mode_abs(data_fetch=False)
-        elif mode == AddressingMode.ZP:
-            (_, addr) = self._mode_zp(data_fetch=False)
-        elif mode == AddressingMode.ZPX:
-            (_, addr) = self._mode_zpx()
-        else:
-            raise IllegalAddressingMode(f"STY {mode.name}")
+        addr = self._addr_fns[mode]()
 
-        self.bus.write(addr, self._y & 0xFF)
-        # if addr not in self.bus.w_mmap:
-        #     assert (self._ram.store[addr] ==  self._y), f"{addr:04x} {self._ram.store[addr]:04x} != {self._y:04x}"
+        self._write(addr, self._y)
 
     def _tax(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"TAX {mode.name}")
+        flags = self._flags
+        self._x = self._a
 
-        self._x = self._a & 0xFF
-
-        self._flags.update_sign(self._a)
-        self._flags.update_zero(self._a)
+        flags.reg = (flags.reg & 0x7D) | (self._a & 0x80) | ((self._a == 0) << 1)
 
     def _tay(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"TAY {mode.name}")
-
-        self._y = self._a & 0xFF
+        flags = self._flags
+        self._y = self._a
 
-        self._flags.update_sign(self._a)
-        self._flags.update_zero(self._a)
+        flags.reg = (flags.reg & 0x7D) | (self._a & 0x80) | ((self._a == 0) << 1)
 
     def _tsx(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"TSX {mode.name}")
-
+        flags = self._flags
         self._x = self._stack.sp
 
-        self._flags.update_sign(self._x)
-        self._flags.update_zero(self._x)
+        flags.reg = (flags.reg & 0x7D) | (self._x & 0x80) | ((self._x == 0) << 1)
 
     def _txa(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"TXA {mode.name}")
-
-        self._a = self._x & 0xFF
+        flags = self._flags
+        self._a = self._x
 
-        self._flags.update_sign(self._a)
-        self._flags.update_zero(self._a)
+        flags.reg = (flags.reg & 0x7D) | (self._a & 0x80) | ((self._a == 0) << 1)
 
     def _txs(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"TXS {mode.name}")
-
+        flags = self._flags
         self._stack.set_sp(self._x)
 
-        self._flags.update_sign(self._stack._sp)
-        self._flags.update_zero(self._stack._sp)
+        flags.reg = (flags.reg & 0x7D) | (self._stack._sp & 0x80) | ((self._stack._sp == 0) << 1)
 
     def _tya(self, mode: AddressingMode):
-        if mode != AddressingMode.IMPLIED:
-            raise IllegalAddressingMode(f"TYA {mode.name}")
+        flags = self._flags
+        self._a = self._y
 
-        self._a = self._y & 0xFF
-
-        self._flags.update_sign(self._a)
-        self._flags.update_zero(self._a)
-
-    def _absix_fetch(self):
-        addr_lo = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        addr_hi = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        addr = (addr_hi << 8) | (addr_lo)
-        addr = (addr + self._x) & 0xFFFF
-        return addr
-
-    def _data_fetch(self):
-        data = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        return data
+        flags.reg = (flags.reg & 0x7D) | (self._a & 0x80) | ((self._a == 0) << 1)
 
     def _zpage_addr_fetch(self):
-        addr = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        return addr
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        if loc >= 0x8000:
+            return self._ram.store[loc]
+        return self._read(loc)
 
     def _addr_fetch(self):
-        addr_lo = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        addr_hi = self.bus.read(self._pc.reg)
-        self._pc.advance_pc()
-        addr = (addr_hi << 8) | (addr_lo)
-        return addr
-
-    def _mode_imm(self):
-        data = self._data_fetch()
-
-        if self.trace:
-            print("_mode_imm", file=self.trace_file)
-            print(f"\tdata: {data:04x}", file=self.trace_file)
+        pc = self._pc
+        loc = pc.reg
+        if 0x8000 <= loc <= 0xFFFC:
+            # Nothing is memory mapped over PRG-ROM, so take both
+            # operand bytes straight from RAM.
+            store = self._ram.store
+            pc.reg = loc + 2
+            return (store[loc + 1] << 8) | store[loc]
+
+        read = self._read
+        addr_lo = read(loc)
+        loc = (loc + 1) & 0xFFFF
+        addr_hi = read(loc)
+        pc.reg = (loc + 1) & 0xFFFF
+        return (addr_hi << 8) | addr_lo
+
+    def _trace_mode(self, fn):
+        if fn is None:
+            return None
+
+        def traced():
+            (data, addr) = fn()
+            print(fn.__name__, file=self.trace_file)
+            if data is not None:
+                print(f"\tdata: {data:04x}", file=self.trace_file)
+            if addr is not None:
+                print(f"\taddr: {addr:04x}", file=self.trace_file)
+            return (data, addr)
 
-        return (data, None)
+        return traced
 
-    def _mode_absix(self):
-        addr = self._absix_fetch()
-        ind_addr_lo = self.bus.read(addr)
-        ind_addr_hi = self.bus.read(addr+1)
-        addr = (ind_addr_hi << 8) | (ind_addr_lo)
-        data = self.bus.read(addr)
+    def _trace_addr(self, fn):
+        if fn is None:
+            return None
 
-        if self.trace:
-            print("_mode_absix", file=self.trace_file)
-            print(f"\tdata: {data:04x}", file=self.trace_file)
+        def traced():
+            addr = fn()
+            print(fn.__name__, file=self.trace_file)
             print(f"\taddr: {addr:04x}", file=self.trace_file)
+            return addr
 
-        return (data, addr)
-
-    def _mode_zp(self, data_fetch=True) -> Tuple[Optional[int], int]:
-        addr = self._zpage_addr_fetch()
-        if data_fetch:
-            data = self.read(addr)
-        else:
-            data = None
-
-        if self.trace:
-            print("_mode_zp", file=self.trace_file)
-            if data_fetch:
-                print(f"\tdata: {data:04x}", file=self.trace_file)
-            print(f"\taddr: {addr:04x}", file=self.trace_file)
+        return traced
 
-        return (data, addr)
+    def _trace_data(self, fn):
+        if fn is None:
+            return None
 
-    def _mode_abs(self, data_fetch=True) -> Tuple[Optional[int], int]:
-        addr = self._addr_fetch()
-        if data_fetch:
-            data = self.bus.read(addr)
-        else:
-            data = None
-
-        if self.trace:
-            print("_mode_abs", file=self.trace_file)
-            if data_fetch:
-                print(f"\tdata: {data:04x}", file=self.trace_file)
-            else:
-                print(f"\tdata: {data}", file=self.trace_file)
-            print(f"\taddr: {addr:04x}", file=self.trace_file)
+        def traced():
+            data = fn()
+            print(fn.__name__, file=self.trace_file)
+            print(f"\tdata: {data:04x}", file=self.trace_file)
+            return data
 
-        return (data, addr)
+        return traced
 
-    def _mode_ind(self):
-        addr = self._addr_fetch()
-        ind_addr_lo = self.bus.read(addr)
-        ind_addr_hi = self.bus.read(addr + 1)
-        ind_addr = (ind_addr_hi << 8) | (ind_addr_lo & 0xFF)
+    def _trace_op(self, opcode, op):
+        def traced(mode):
+            print(f"{(self._pc.reg - 1) & 0xFFFF:04x} {opcode:02x} {op.__qualname__}", file=self.trace_file)
+            returned = op(mode)
+            print(
+                f"\tA: {self._a:02x} X: {self._x:02x} Y: {self._y:02x}"
+                f" P: {self._flags.reg:02x} SP: {self._stack._sp & 0xFF:02x}",
+                file=self.trace_file
+            )
+            return returned
 
-        if self.trace:
-            print("_mode_ind", file=self.trace_file)
-            print(f"\t    addr: {addr:04x}", file=self.trace_file)
-            print(f"\tind_addr: {ind_addr:04x}", file=self.trace_file)
+        return traced
 
-        return (None, ind_addr)
+    def _mode_acc(self):
+        return (self._a, None)
 
-    def _mode_zpiy(self):
-        addr = self._zpage_addr_fetch()
-        ind_addr_lo = self.bus.read(addr)
-        ind_addr_hi = self.bus.read(addr+1)
-        ind_addr = (ind_addr_hi << 8) | (ind_addr_lo & 0xFF)
-        index_offset = (ind_addr + self._y) & 0xFFFF
-        data = self.bus.read(index_offset)
+    def _mode_zp(self) -> Tuple[int, int]:
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        store = self._ram.store
+        addr = store[loc] if loc >= 0x8000 else self._read(loc)
 
-        if self.trace:
-            print("_mode_zpiy", file=self.trace_file)
-            print(f"\tdata: {data:04x}", file=self.trace_file)
-            print(f"\taddr: {index_offset:04x}", file=self.trace_file)
+        return (store[addr], addr)
 
-        return (data, index_offset)
-
-    def _mode_absx(self):
+    def _mode_abs(self) -> Tuple[int, int]:
         addr = self._addr_fetch()
-        indexed_addr = (addr + self._x)# % 0xFFFF
-        data = self.bus.read(indexed_addr)
-
-        if self.trace:
-            print("_mode_absx", file=self.trace_file)
-            print(f"\tdata: {data:04x}", file=self.trace_file)
-            print(f"\taddr: {indexed_addr:04x}", file=self.trace_file)
+        data = self._read(addr)
 
-        return (data, indexed_addr)
+        return (data, addr)
 
-    def _mode_absy(self):
+    def _mode_absx(self):
         addr = self._addr_fetch()
-        indexed_addr = (addr + (self._y & 0xFF)) & 0xFFFF
-        data = self.bus.read(indexed_addr)
-
-        if self.trace:
-            print("_mode_absy", file=self.trace_file)
-            print(f"\tdata: {data:04x}", file=self.trace_file)
-            print(f"\taddr: {indexed_addr:04x}", file=self.trace_file)
-            print(f"\t   y: {self._y:04x}")
+        indexed_addr = (addr + self._x) & 0xFFFF
+        data = self._read(indexed_addr)
 
         return (data, indexed_addr)
 
     def _mode_zpx(self):
-        addr = self._zpage_addr_fetch()
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        store = self._ram.store
+        addr = store[loc] if loc >= 0x8000 else self._read(loc)
         indexed_addr = (addr + self._x) & 0xFF
-        data = self.read(indexed_addr)
 
-        if self.trace:
-            print("_mode_zpx", file=self.trace_file)
-            print(f"\tdata: {data:04x}", file=self.trace_file)
-            print(f"\taddr: {indexed_addr:04x}", file=self.trace_file)
-        return (data, indexed_addr)
-
-    def _mode_zpy(self):
-        addr = self._zpage_addr_fetch()
-        indexed_addr = (addr + self._y) & 0xFF
-        data = self.read(indexed_addr)
-
-        if self.trace:
-            print("_mode_zpy", file=self.trace_file)
-            print(f"\tdata: {data:04x}", file=self.trace_file)
-            print(f"\taddr: {indexed_addr:04x}", file=self.trace_file)
-
-        return (data, indexed_addr)
-
-    def _mode_zpix(self):
-        addr = self._zpage_addr_fetch()
-        indexed_addr = (addr + self._x) & 0xFFFF
-        addr_lo = self.bus.read(indexed_addr)
-        addr_hi = self.bus.read(indexed_addr+1)
-        addr = (addr_hi << 8) | (addr_lo & 0xFF)
-        data = self.bus.read(addr)
-
-        if self.trace:
-            print("_mode_zpix", file=self.trace_file)
-            print(f"\tdata: {data:04x}", file=self.trace_file)
-            print(f"\taddr: {addr:04x}", file=self.trace_file)
-
-        return (data, addr)
+        return (store[indexed_addr], indexed_addr)
+
+    def _data_imm(self):
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        if loc >= 0x8000:
+            return self._ram.store[loc]
+        return self._read(loc)
+
+    def _data_zp(self):
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        store = self._ram.store
+        addr = store[loc] if loc >= 0x8000 else self._read(loc)
+        return store[addr]
+
+    def _data_zpx(self):
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        store = self._ram.store
+        addr = store[loc] if loc >= 0x8000 else self._read(loc)
+        return store[(addr + self._x) & 0xFF]
+
+    def _data_zpy(self):
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        store = self._ram.store
+        addr = store[loc] if loc >= 0x8000 else self._read(loc)
+        return store[(addr + self._y) & 0xFF]
+
+    def _data_abs(self):
+        return self._read(self._addr_fetch())
+
+    def _data_absx(self):
+        return self._read((self._addr_fetch() + self._x) & 0xFFFF)
+
+    def _data_absy(self):
+        return self._read((self._addr_fetch() + self._y) & 0xFFFF)
+
+    def _data_zpix(self):
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        store = self._ram.store
+        indexed_addr = (store[loc] if loc >= 0x8000 else self._read(loc)) + self._x
+        return self._read((store[indexed_addr + 1] << 8) | store[indexed_addr])
+
+    def _data_zpiy(self):
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        store = self._ram.store
+        addr = store[loc] if loc >= 0x8000 else self._read(loc)
+        return self._read((((store[addr + 1] << 8) | store[addr]) + self._y) & 0xFFFF)
+
+    def _addr_ind(self):
+        read = self._read
+        addr = self._addr_fetch()
+        ind_addr_lo = read(addr)
+        # The 6502 never carries into the high byte of the pointer, so
+        # JMP ($xxFF) takes its high byte from $xx00.
+        ind_addr_hi = read((addr & 0xFF00) | ((addr + 1) & 0xFF))
+        return (ind_addr_hi << 8) | ind_addr_lo
+
+    def _addr_zpiy(self):
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        store = self._ram.store
+        addr = store[loc] if loc >= 0x8000 else self._read(loc)
+        return (((store[addr + 1] << 8) | store[addr]) + self._y) & 0xFFFF
+
+    def _addr_absx(self):
+        return (self._addr_fetch() + self._x) & 0xFFFF
+
+    def _addr_absy(self):
+        return (self._addr_fetch() + self._y) & 0xFFFF
+
+    def _addr_zpx(self):
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        addr = self._ram.store[loc] if loc >= 0x8000 else self._read(loc)
+        return (addr + self._x) & 0xFF
+
+    def _addr_zpy(self):
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        addr = self._ram.store[loc] if loc >= 0x8000 else self._read(loc)
+        return (addr + self._y) & 0xFF
+
+    def _addr_zpix(self):
+        pc = self._pc
+        loc = pc.reg
+        pc.reg = (loc + 1) & 0xFFFF
+        store = self._ram.store
+        indexed_addr = (store[loc] if loc >= 0x8000 else self._read(loc)) + self._x
+        return (store[indexed_addr + 1] << 8) | store[indexed_addr]
 
     def dump(self):
         with open("bits/dump.out", "w") as f:
             print(f" I: {self._instruction_count}", file=f)
-            print(f" P: 0b{self._flags.to_int():08b}", file=f)
+            print(f" P: 0b{self._flags.reg:08b}", file=f)
             print(f"PC: 0x{self._pc.reg:04x}", file=f)
             print(f" A: 0x{self._a:04x}", file=f)
             print(f" X: 0x{self._x:04x}", file=f)
             print(f" Y: 0x{self._y:04x}", file=f)
             self._ram.dump(file=f)
 
-    def execute(self, trace=False, trace_file=None):
-        start = time.time()
+    def execute(self, trace=False, trace_file=None) -> bool:
+        return self.run(1, trace, trace_file)
+
+    # Runs up to count instructions. Returns True if it stopped early
+    # because an RTI was executed.
+    def run(self, count: int, trace=False, trace_file=None) -> bool:
         self.trace = trace
         self.trace_file = trace_file
+        (self._data_fns, self._mode_fns, self._addr_fns) = self._mode_tables[bool(trace)]
+
+        pc = self._pc
+        read = self._read
+        store = self._ram.store
+        ops = self._op_tables[bool(trace)]
+        modes = self._opcode_modes
+        for _ in range(count):
+            instruction_addr = pc.reg
+            # Opcodes and their operands almost always come from PRG-ROM,
+            # where nothing is memory mapped.
+            if instruction_addr >= 0x8000:
+                instruction = store[instruction_addr]
+            else:
+                instruction = read(instruction_addr)
+            pc.reg = (instruction_addr + 1) & 0xFFFF
 
-        instruction_addr = self._pc.reg
-        instruction = self._data_fetch()
-
-        table = (instruction & 0xF0) >> 4
-        entry = instruction & 0x0F
-        table_block = self._lookup_table[table]
-        (op, addr_mode) = table_block[entry]
-
-        if op is None:
-            print(f"table: {table:01x}, entry: {entry:01x}")
-            self.dump()
-            raise EndOfExecution()
-
-        if self.trace:
-            print(f"{instruction_addr:04x} {instruction:02x} {op.__qualname__}", file=self.trace_file)
-
-        op(addr_mode)
-        self._instruction_count += 1
-        end = time.time()
-        return end - start
+            self._instruction_count += 1
+            if ops[instruction](modes[instruction]):
+                return True
 
+        return False
 
     def load(self, rom_buffer: BufferedReader, prg_size: int = 0, start_load: int = 0x8000):
         rom_buffer.seek(16)
-        buffer : bytes = rom_buffer.read1(1)
-        mem_loc = start_load
-        prg_read_size = 1
-        while buffer and prg_read_size < prg_size and prg_read_size <= len(self._ram.store):
-            self._ram.write(mem_loc, int.from_bytes(buffer, 'big') & 0xFF)
-            buffer = rom_buffer.read1(1)
-            mem_loc += 1
-            prg_read_size += 1
+        with memoryview(self._ram.store) as store:
+            rom_buffer.readinto(store[start_load:start_load + prg_size])
 
         # XXX If PRG-ROM is 16K, mirror it.
         if prg_size <= (16 * 1024):
-            prg = self._ram.store[0x8000:0xBFFF]
-            for (n, byte) in enumerate(prg):
-                self._ram.store[0xC000 + n] = byte
+            self._ram.store[0xC000:0x10000] = self._ram.store[0x8000:0xC000]
 
     def reset(self):
         start_lo = self._ram.read(0xFFFC)
@@ -1473,19 +1183,24 @@ class MPU(BusMember):
         self._y = 0
 
     def nmi(self) -> None:
-        self._stack.push(self._pc.pc_hi())
-        self._stack.push(self._pc.pc_lo())
-        self._stack.push(self._flags.to_int())
+        ret = self._pc.reg
+        stack = self._stack
+        store = self._ram.store
+        sp = stack._sp
+        store[sp] = ret >> 8
+        store[0x100 | ((sp - 1) & 0xFF)] = ret & 0xFF
+        store[0x100 | ((sp - 2) & 0xFF)] = self._flags.reg
+        stack._sp = 0x100 | ((sp - 3) & 0xFF)
         self._pc.set_pc_lo(self._ram.read(0xFFFA))
         self._pc.set_pc_hi(self._ram.read(0xFFFB))
         if self.trace:
             print("NMI")
 
     def read(self, loc:int) -> int:
-        return self._ram.store[loc % 0xFFFF]
+        return self._ram.store[loc & 0xFFFF]
 
     def write(self, loc:int, data:int) -> None:
-        self._ram.store[loc % 0xFFFF] = data
+        self._ram.store[loc & 0xFFFF] = data
 
     def dma_transfer(self, page: int, to: BusMember) -> None:
         self._ram.dma_transfer(page, to)
@@ -1,113 +1,105 @@
 import pygame
 
 from io import BufferedReader
-from typing import Literal, List
-
-from bitarray import bitarray
-from bitarray.util import ba2int
+from typing import Dict, Literal, List, Tuple
 
 from exc.core import RaisedNMI
 from core.bus import Bus
 from core.bus_member import BusMember
 from core.memory_mapped_io import MemoryMappedIO
 from memory.oam import OAM
-from memory.ppu_ram import PPURAM, CHRObj
+from memory.ppu_ram import PPURAM
 from utils.memdump import memdump
 
+# Start of each nametable in PPU RAM, indexed by PPUCTRL's nametable select.
+_NAMETABLE_BASES = (0x2000, 0x2400, 0x2800, 0x2C00)
+
+# Screen x of each of the 32 background tiles in a row.
+_TILE_XS = tuple(range(0, 256, 8))
+
 
 class PPUCtrl(MemoryMappedIO):
     def __init__(self):
-        self._nmi = 0
-        self.ppu = 0
-        self.height = 0
-        self.bg_select = 0
-        self.sprite_select = 0
-        self.inc_mode = 0
-        self._nametable_select_hi = 0
-        self._nametable_select_lo = 0
-
-    def _nametable_select(self, nt:int):
-        nt &= 0x03
-        self._nametable_select_hi = (nt & 0x02) >> 1
-        self._nametable_select_lo = nt & 0x01
+        self._reg = 0
 
     @property
-    def nametable_select(self) -> int:
-        return (self._nametable_select_hi << 1) | self._nametable_select_lo
+    def nmi(self) -> bool:
+        return (self._reg & 0x80) != 0
 
     @property
-    def nmi(self) -> bool:
-        return self._nmi == 1
+    def ppu(self) -> int:
+        return (self._reg & 0x40) >> 6
+
+    @property
+    def height(self) -> int:
+        return (self._reg & 0x20) >> 5
+
+    @property
+    def bg_select(self) -> int:
+        return (self._reg & 0x10) >> 4
+
+    @property
+    def sprite_select(self) -> int:
+        return (self._reg & 0x08) >> 3
+
+    @property
+    def inc_mode(self) -> int:
+        return (self._reg & 0x04) >> 2
+
+    @property
+    def nametable_select(self) -> int:
+        return self._reg & 0x03
 
     def write(self, loc:int, data:int):
-        print("PPUCtrl:", f"{data:08b}")
-        self._nmi = (data & 0x80) >> 7
-        self.ppu = (data & 0x40) >> 6
-        self.height = (data & 0x20) >> 5
-        self.bg_select = (data & 0x10) >> 4
-        self.sprite_select = (data & 0x08) >> 3
-        self.inc_mode = (data & 0x04) >> 2
-        self._nametable_select(data)
+        self._reg = data & 0xFF
 
     def read(self, loc:int) -> int:
-        register = bitarray([
-            self._nmi,
-            self.ppu,
-            self.height,
-            self.bg_select,
-            self.sprite_select,
-            self.inc_mode,
-            self._nametable_select_hi,
-            self._nametable_select_lo
-        ])
-
-        return ba2int(register)
+        return self._reg
 
 class PPUMask(MemoryMappedIO):
     def __init__(self):
-        self.blue = 0
-        self.green = 0
-        self.red = 0
-        self._sprite_enable = 0
-        self._bg_enable = 0
-        self.sprite_left_col = 0
-        self.bg_left_col = 0
-        self.greyscale = 0
+        self._reg = 0
+
+    @property
+    def blue(self) -> int:
+        return (self._reg & 0x80) >> 7
+
+    @property
+    def green(self) -> int:
+        return (self._reg & 0x40) >> 6
+
+    @property
+    def red(self) -> int:
+        return (self._reg & 0x20) >> 5
 
     @property
     def sprite_enable(self) -> bool:
-        return self._sprite_enable == 1
+        return (self._reg & 0x10) != 0
 
     @property
     def bg_enable(self) -> bool:
-        return self._bg_enable == 1
+        return (self._reg & 0x08) != 0
+
+    @property
+    def sprite_left_col(self) -> int:
+        return (self._reg & 0x04) >> 2
+
+    @property
+    def bg_left_col(self) -> int:
+        return (self._reg & 0x02) >> 1
+
+    @property
+    def greyscale(self) -> int:
+        return self._reg & 0x01
 
     def rendering_enabled(self) -> bool:
-        return self.sprite_enable and self.bg_enable
+        return (self._reg & 0x18) == 0x18
 
     def write(self, loc:int, data:int):
-        self.blue = (data & 0x80) >> 7
-        self.green = (data & 0x40) >> 6
-        self.red = (data & 0x20) >> 5
-        self._sprite_enable = (data & 0x10) >> 4
-        self._bg_enable = (data & 0x08) >> 3
-        self.sprite_left_col = (data & 0x04) >> 2
-        self.bg_left_col = (data & 0x02) >> 1
-        self.greyscale = (data & 0x01)
+        self._reg = data & 0xFF
 
     def read(self, loc:int) -> int:
-        register = bitarray([
-            self.blue,
-            self.green,
-            self.red,
-            self._sprite_enable,
-            self._bg_enable,
-            self.sprite_left_col,
-            self.bg_left_col,
-            self.greyscale
-        ])
-
-        return ba2int(register)
+        return self._reg
 
 class PPUStatus(MemoryMappedIO):
     def __init__(self, ppu:"PPU"):
@@ -127,24 +119,11 @@ class PPUStatus(MemoryMappedIO):
         return None
 
     def read(self, loc) -> int:
+        vblank = self._vblank
+        self._vblank = 0
         self.ppu.w = False
 
-        register = bitarray([
-            self._vblank,
-            self.sprite_0_hit,
-            self.sprite_overflow,
-            0,
-            0,
-            0,
-            0,
-            0
-        ])
-
-        int_register = ba2int(register, False)
-        if self.vblank:
-            self.set_vblank(0)
-
-        return int_register
+        return (vblank << 7) | (self.sprite_0_hit << 6) | (self.sprite_overflow << 5)
 
 class PPUScroll(MemoryMappedIO):
     def __init__(self, ppu:"PPU"):
@@ -167,8 +146,6 @@ class PPUScroll(MemoryMappedIO):
             self.ppu.t |= fine_y | coarse_y
             self.ppu.w = False
 
-        print(f"PPUSCROLL: {self.ppu.t:04x} {data:04x}")
-
 class PPUAddressData(MemoryMappedIO):
     ADDR = 0x2006
     DATA = 0x2007
@@ -205,20 +182,15 @@ class PPUAddressData(MemoryMappedIO):
         self.data = data
         if loc == PPUAddressData.ADDR and not self.ppu.w:
             self.ppu.t = ((data << 8) & 0x3F00)
-            # print("WRITE PPUADDR")
-            # print(f"\t1st: {self.ppu.t:04x}")
             self.ppu.w = True
         elif loc == PPUAddressData.ADDR and self.ppu.w:
             self.ppu.t = (data & 0x00FF) | (self.ppu.t)
             self.ppu.v = self.ppu.t
-            # print("WRITE PPUADDR")
-            # print(f"\t2nd: {self.ppu.t:04x}")
             self.ppu.w = False
         elif loc == PPUAddressData.DATA:
-            # print("WRITE PPUDATA")
-            # print(f"\t{self.ppu.v:04x}")
-            # print(f"\t{self.data:04x}")
             self._ram.write(self.ppu.v, self.data)
+            if self.ppu.v < 0x2000:
+                self.ppu.invalidate_chr()
             self.increment_address()
 
     def increment_address(self) -> None:
@@ -234,26 +206,28 @@ class PPUAddressData(MemoryMappedIO):
         self.coarse_y_inc()
 
     def coarse_y_inc(self):
-        if ((self.ppu.v & 0x7000) != 0x7000):
-            self.ppu.v += 0x1000
+        v = self.ppu.v
+        if (v & 0x7000) != 0x7000:
+            self.ppu.v = v + 0x1000
+            return
+
+        v &= ~0x7000
+        y = (v & 0x03E0) >> 5
+        if y == 29:
+            y = 0
+            v ^= 0x0800
+        elif y == 31:
+            y = 0
         else:
-            self.ppu.v &= ~0x7000
-            y = (self.ppu.v & 0x03E0) >> 5
-            if y == 29:
-                self.ppu.v = 0
-                self.ppu.v ^= 0x0800
-            elif y == 31:
-                y = 0
-            else:
-                y += 1
-            self.ppu.v = (self.ppu.v & ~0x03E0) | (y << 5)
+            y += 1
+        self.ppu.v = (v & ~0x03E0) | (y << 5)
 
     def coarse_x_inc(self):
-        if ((self.ppu.v & 0x001F) == 31):
-            self.ppu.v &= ~0x001F
-            self.ppu.v ^= 0x0400
+        v = self.ppu.v
+        if (v & 0x001F) == 31:
+            self.ppu.v = (v & ~0x001F) ^ 0x0400
         else:
-            self.ppu.v += 1
+            self.ppu.v = v + 1
 
 
 class PPU(BusMember):
@@ -274,9 +248,26 @@ class PPU(BusMember):
         self.w = False
 
         self.scanline = 0
+        self.frame = 0
 
         self.nmi_triggered = False
 
+        # Decoded CHR rows keyed by (pattern table, tile, fine y), and their
+        # mirrored copies for sprites keyed by (pattern table, tile, fine y,
+        # hflip). Both are cleared whenever the pattern tables change.
+        self._chr_cache: Dict[Tuple[int, int, int], pygame.Surface] = {}
+        self._flip_cache: Dict[Tuple[int, int, int, bool], pygame.Surface] = {}
+
+        # OAM indices of the sprites on each visible scanline, at most eight
+        # per line. Rebuilt once per frame when vblank ends.
+        self._sprite_rows: List[List[int]] = [[] for _ in range(240)]
+
+        # The background as last drawn, one scanline at a time, along with
+        # the nametable row and pattern table each line was drawn from. A
+        # line is only redrawn when those change.
+        self._bg_surface = pygame.Surface((256, 240))
+        self._scanline_cache: Dict[int, Tuple[bytes, int]] = {}
+
         # Read-only memory map
         self.ro_mmap = {
             0x2002: self._ppustatus,
@@ -297,43 +288,80 @@ class PPU(BusMember):
             0x4014: self._oam
         }
 
+        # The same registers indexed by loc & 7, so a register access from
+        # the bus is a tuple index rather than a dict lookup.
+        self._read_regs = tuple(self.ro_mmap.get(0x2000 | n) for n in range(8))
+        self._write_regs = tuple(self.w_mmap[0x2000 | n] for n in range(8))
+
         self._ram: PPURAM
+        self._ram_view: memoryview
         self._bus: Bus
 
     def set_ram(self, val: PPURAM):
         self._ram = val
+        self._ram_view = memoryview(val.store)
+        self.invalidate_chr()
 
     def set_bus(self, val: Bus):
         self._bus = val
 
     def read(self, loc):
-        return self.ro_mmap[loc].read(loc)
+        return self._read_regs[loc & 0x07].read(loc)
 
     def write(self, loc, val):
-        if loc in self.w_mmap:
-            self.w_mmap[loc].write(loc, val)
+        # Anything below the registers is a byte of an OAM DMA transfer.
+        if loc < 0x2000:
+            self._oam._oam_storage.write(loc, val)
+        elif loc == OAM.DMA:
+            self._oam.write(loc, val)
         else:
-            self.w_mmap[OAM.DMA]._oam_storage.write(loc, val)
+            self._write_regs[loc & 0x07].write(loc, val)
 
-        if loc == 0x2000:
-            print("NMI:", self._ppuctrl.nmi)
+    def dma_write(self, data: bytes) -> None:
+        self._oam._oam_storage.store[0:0x100] = data
 
     def load(self, rom_buffer: BufferedReader, chr_size: int = 0):
         self._ram = PPURAM(size=0x3FFF)
+        self._ram_view = memoryview(self._ram.store)
         self._ppuaddr.set_ram(self._ram)
-        mem_loc = 0
-        chr_byte : bytes = rom_buffer.read1(1)
-        while chr_byte and mem_loc < chr_size:
-            chr_int = int.from_bytes(chr_byte, 'little')
-            self._ram.write(mem_loc, chr_int)
-            mem_loc += 1
-            chr_byte = rom_buffer.read1(1)
+        self.invalidate_chr()
+        rom_buffer.readinto(self._ram_view[0:chr_size])
+
+    def _chr_image(self, page: int, tile: int, plane: int) -> pygame.Surface:
+        key = (page, tile, plane)
+        image = self._chr_cache.get(key)
+        if image is None:
+            image = self._ram.read_chr(page, tile, plane).image
+            self._chr_cache[key] = image
+        return image
+
+    def _sprite_image(self, page: int, tile: int, plane: int, hflip: bool) -> pygame.Surface:
+        key = (page, tile, plane, hflip)
+        image = self._flip_cache.get(key)
+        if image is None:
+            image = pygame.transform.flip(self._chr_image(page, tile, plane), hflip, False)
+            self._flip_cache[key] = image
+        return image
+
+    def invalidate_chr(self) -> None:
+        self._chr_cache.clear()
+        self._flip_cache.clear()
+        self._scanline_cache.clear()
+
+    def _index_sprites(self) -> None:
+        rows: List[List[int]] = [[] for _ in range(240)]
+        store = self._oam._oam_storage.store
+        for sprite in range(64):
+            y = store[sprite * 4]
+            for row in rows[y:y + 8]:
+                if len(row) < 8:
+                    row.append(sprite)
+        self._sprite_rows = rows
 
     def nmi(self) -> None:
         if self._ppustatus.vblank and self._ppuctrl.nmi and not self.nmi_triggered:
             self.nmi_triggered = True
             self._bus.nmi()
-            print("RAISED NMI")
             raise RaisedNMI()
 
     def dma(self):
@@ -350,66 +378,63 @@ class PPU(BusMember):
                 self.v = self.t
 
             pygame.display.flip()
+            self.frame += 1
             self.scanline = 0
             self.nmi_triggered = False
             self._ppustatus.sprite_0_hit = 0
+            self._index_sprites()
 
         if not self._ppumask.rendering_enabled():
             self.scanline += 1
             return
 
-        if self._ppuctrl.nametable_select == 0:
-            nametable_slice = self._ram.store[0x2000:0x23C0]
-        elif self._ppuctrl.nametable_select == 1:
-            print("nametable A")
-            nametable_slice = self._ram.store[0x2400:0x27C0]
-        elif self._ppuctrl.nametable_select == 2:
-            print("nametable B")
-            nametable_slice = self._ram.store[0x2800:0x2BC0]
-        elif self._ppuctrl.nametable_select == 3:
-            print("nametable B")
-            nametable_slice = self._ram.store[0x2C00:0x2FC0]
-        else:
-            raise Exception("Invalid nametable.")
+        scanline = self.scanline
 
-        if self.scanline < 240 and self._ppumask.bg_enable:
-            offset_y = (self.scanline // 8) * 32 if self.scanline != 0 else 0
+        if scanline < 240 and self._ppumask.bg_enable:
+            nametable_base = _NAMETABLE_BASES[self._ppuctrl.nametable_select]
+            nametable_slice = self._ram_view[nametable_base:nametable_base + 0x3C0]
+            offset_y = (scanline // 8) * 32 if scanline != 0 else 0
             nametable_row = nametable_slice[offset_y:offset_y + 32]
-            x_pos = 0
-            nametable_tiles: List[CHRObj] = []
-            for tile_num in nametable_row:
-                tile = self._ram.read_chr(self._ppuctrl.bg_select, tile_num, (self.scanline % 8))
-                tile.rect.x = x_pos
-                tile.rect.y = self.scanline
-
-                nametable_tiles.append(tile)
-                x_pos += 8
-                # self._ppudata.coarse_x_inc()
-                if x_pos >= 255:
-                    # self._ppudata.coarse_y_inc()
-                    break
-
-            for nametable_tile in nametable_tiles:
-                screen.blit(nametable_tile.image, nametable_tile.rect)
-
-        if self.scanline < 240 and self._ppumask.sprite_enable:
-            tiles: List[CHRObj] = []
-            for tile in range(64):
-                chr = self._oam._oam_storage.read(tile)
-                if chr.y <= self.scanline + abs(self.scanline - chr.y) < chr.y + 8:
-                    continue
-                tile = self._ram.read_chr(self._ppuctrl.sprite_select, chr.tile_num, ((chr.y + self.scanline) % 8))
-                tile.rect.x = chr.x
-                tile.rect.y = chr.y + ((chr.y + self.scanline) % 8)
-                tile.image = pygame.transform.flip(
-                    tile.image,
-                    chr.attributes.flip_horizontal,
-                    chr.attributes.flip_vertical
+            bg_select = self._ppuctrl.bg_select
+            row_bytes = bytes(nametable_row)
+            if self._scanline_cache.get(scanline) != (row_bytes, bg_select):
+                chr_image = self._chr_image
+                fine_y = scanline % 8
+                self._bg_surface.blits(
+                    [
+                        (chr_image(bg_select, tile_num, fine_y), (x_pos, scanline))
+                        for (tile_num, x_pos) in zip(nametable_row, _TILE_XS)
+                    ],
+                    doreturn=False
+                )
+                self._scanline_cache[scanline] = (row_bytes, bg_select)
+
+            screen.blit(self._bg_surface, (0, scanline), (0, scanline, 256, 1))
+
+        if scanline < 240 and self._ppumask.sprite_enable:
+            # Read the OAM bytes in place rather than through OAMRAM.read,
+            # which builds an OAMEntry for every sprite.
+            oam = self._oam._oam_storage.store
+            sprite_image = self._sprite_image
+            sprite_select = self._ppuctrl.sprite_select
+            tiles: List[Tuple[pygame.Surface, Tuple[int, int]]] = []
+            for tile in self._sprite_rows[scanline]:
+                oam_loc = tile * 4
+                attributes = oam[oam_loc + 2]
+                row = scanline - oam[oam_loc]
+                # Flipping a single row vertically does nothing, so vertical
+                # flip picks the mirrored row of the tile instead.
+                if attributes & 0x80:
+                    row = 7 - row
+                image = sprite_image(
+                    sprite_select,
+                    oam[oam_loc + 1],
+                    row,
+                    (attributes & 0x40) != 0
                 )
-                tiles.append(tile)
+                tiles.append((image, (oam[oam_loc + 3], scanline)))
 
-            for tile in tiles:
-                screen.blit(tile.image, tile.rect)
+            screen.blits(tiles, doreturn=False)
 
         self.scanline += 1
 
@@ -4,7 +4,6 @@ from chr.tile import Tile
 from exc.core import (
     EndOfExecution,
     RaisedNMI,
-    ReturnFromInterrupt,
     IllegalAddressingMode
 )
 from core.bus import Bus
@@ -27,22 +26,27 @@ class System:
         screen = pygame.display.set_mode((256, 240), flags=flags)
 
         self._mpu.reset()
+
+        event_get = pygame.event.get
+        mpu_run = self._mpu.run
+        ppu = self._ppu
+        ppu_render = ppu.render
+        frame = -1
         try:
             while True:
-                for event in pygame.event.get():
-                    if event.type == pygame.QUIT:
-                        raise EndOfExecution()
+                # Drain the event queue once per frame rather than on every
+                # slice of CPU time.
+                if ppu.frame != frame:
+                    frame = ppu.frame
+                    for event in event_get():
+                        if event.type == pygame.QUIT:
+                            raise EndOfExecution()
 
-                for _ in range(113):
-                    try:
-                        self._mpu.execute(trace, trace_file)
-                    except ReturnFromInterrupt:
-                        print("END INTERRUPT")
-                        break
+                mpu_run(113, trace, trace_file)
 
                 for _ in range(50):
                     try:
-                        self._ppu.render(screen)
+                        ppu_render(screen)
                     except RaisedNMI:
                         break
 
@@ -66,7 +70,5 @@ class System:
             header.read()
             header.dump()
 
-            rom_buffer.seek(0)
-
             self._mpu.load(rom_buffer, header.prg_rom)
             self._ppu.load(rom_buffer, header.chr_rom)
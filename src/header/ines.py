@@ -1,3 +1,5 @@
+import struct
+
 from io import BufferedReader
 
 from exc.core import InvalidROM
@@ -12,27 +14,21 @@ class INESHeader:
         self.horizontal_nametable = False
 
     def read(self):
-        buffer = self.rom_buffer.read1(16)
-        self.magic = buffer[0:4]
-        if self.magic != b"NES\x1a":
+        buffer = self.rom_buffer.read(16)
+        if len(buffer) < 16:
             raise InvalidROM()
 
-        self.prg_rom = buffer[4] * (16 * 1024)
-        self.chr_rom = buffer[5] * (8 * 1024)
-
-        nametable = buffer[6]
-        if nametable & 0x01:
-            self.vertical_nametable = True
-        else:
-            self.horizontal_nametable = True
+        (self.magic, prg_rom, chr_rom, nametable, ines2) = struct.unpack_from("<4sBBBB", buffer)
+        if self.magic != b"NES\x1a":
+            raise InvalidROM()
 
-        ines2 = buffer[7]
-        if ines2 & 0x0C == 0x08:
-            ines2_format = True
-        else:
-            ines2_format = False
+        self.prg_rom = prg_rom * (16 * 1024)
+        self.chr_rom = chr_rom * (8 * 1024)
 
+        self.vertical_nametable = bool(nametable & 0x01)
+        self.horizontal_nametable = not self.vertical_nametable
 
+        ines2_format = (ines2 & 0x0C) == 0x08
 
     def dump(self):
         print(f"magic: {self.magic}")
@@ -1,63 +1,48 @@
 import traceback
 
-import pygame
+from array import array
 
-from bitarray.util import int2ba
+import pygame
 
 from memory.ram import RAM
 from chr.chr_obj import CHRObj
 
+# Canonical PPU address for each raw address, with $3000-$3EFF folded back
+# onto the nametables at $2000-$2EFF.
+_NAMETABLE_MIRROR = array('H', range(0x4000))
+_NAMETABLE_MIRROR[0x3000:0x3F00] = array('H', range(0x2000, 0x2F00))
+
 class PPURAM(RAM):
     def __init__(self, size: int = 0x3FFF):
         super().__init__(size)
 
     def _mirror_nametables(self, loc:int) -> int:
-        if loc >= 0x3000 and loc <= 0x3EFF:
-            loc = loc - 0x1000
-        return loc
+        return _NAMETABLE_MIRROR[loc]
 
     def read_chr(self, page:int, tile:int, plane:int) -> CHRObj:
         address = page << 12
         address |= (tile << 4)
 
-        chr = CHRObj()
-        plane0 = []
-        plane0.append(self.store[address | plane])
-
-        plane1 = []
-        address |= 1 << 3
-        plane1.append(self.store[address | plane])
+        pixels0 = self.store[address | plane]
+        pixels1 = self.store[address | 8 | plane]
 
         chr = CHRObj()
         pixel_array = pygame.PixelArray(chr.image)
+        colors = (chr.COLOR0, chr.COLOR1, chr.COLOR2, chr.COLOR3)
 
-        x = 0
-        y = 0
-        for (pixels0, pixels1) in zip(plane0, plane1):
-            ba_pixels0 = int2ba(pixels0, 8, 'big', 0)
-            ba_pixels1 = int2ba(pixels1, 8, 'big', 0)
-            for (pixel0, pixel1) in zip(ba_pixels0, ba_pixels1):
-                if pixel0 == 0 and pixel1 == 0:
-                    pixel_array[x, y] = chr.COLOR0 # type: ignore
-                elif pixel0 == 1 and pixel1 == 0:
-                    pixel_array[x, y] = chr.COLOR1 # type: ignore
-                elif pixel0 == 0 and pixel1 == 1:
-                    pixel_array[x, y] = chr.COLOR2 # type: ignore
-                elif pixel0 == 1 and pixel1 == 1:
-                    pixel_array[x, y] = chr.COLOR3 # type: ignore
-                x += 1
-            x = 0
-            y += 1
+        for x in range(8):
+            shift = 7 - x
+            pixel_array[x, 0] = colors[((pixels0 >> shift) & 1) | (((pixels1 >> shift) & 1) << 1)] # type: ignore
         return chr
 
     def read(self, loc: int) -> int:
         try:
-            return self.store[loc]
+            return self.store[_NAMETABLE_MIRROR[loc]]
         except IndexError as e:
             raise RuntimeError(f"Out of bounds read memory access {loc:04x} max {len(self.store):04x}") from e
 
     def write(self, loc:int, data:int):
         try:
-            self.store[loc] = data
+            self.store[_NAMETABLE_MIRROR[loc]] = data
         except IndexError as e:
             raise RuntimeError(f"Out of bounds write memory access {loc:04x} max {len(self.store):04x}") from e
\ No newline at end of file
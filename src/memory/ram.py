@@ -1,30 +1,20 @@
 import random
-import string
 import traceback
 
+from utils.memdump import PRINTABLE
+
 class RAM:
+    __slots__ = ('size', 'store')
+
     def __init__(self, size: int = 0xFFFF):
         self.size = size
-        self.store = []
-        for _ in range(size + 1):
-            self.store.append(0)
+        self.store = bytearray(size + 1)
 
     def _mirror_map(self, loc) -> int:
-        if loc >= 0x0000 and loc <= 0x07FF:
-            return loc
-        elif loc >= 0x0800 and loc <= 0x0FFF:
-            return loc - 0x0800
-        elif loc >= 0x1000 and loc <= 0x17FF:
-            return loc - 0x1000
-        elif loc >= 0x1800 and loc <= 0x1FFF:
-            return loc - 0x1800
-        else:
-            return loc
+        return loc & 0x07FF if loc < 0x2000 else loc
 
     def set_size(self, size: int = 0xFFFF):
-        self.store = []
-        for _ in range(size + 1):
-            self.store.append(0)
+        self.store = bytearray(size + 1)
 
     def read(self, loc) -> int:
         try:
@@ -40,12 +30,7 @@ class RAM:
 
     def dma_transfer(self, page, to):
         base_address = (page << 8) & 0xFF00
-        end_address = base_address | 0x00FF
-
-        to_loc = 0
-        for n in range(base_address, end_address + 1):
-            to.write(to_loc, self.store[n])
-            to_loc += 1
+        to.dma_write(self.store[base_address:base_address + 0x100])
 
     def dump(self, file=None) -> None:
         print(type(self).__name__, file=file)
@@ -54,7 +39,7 @@ class RAM:
 
             print(
                 f"{n:04x}",
-                " ".join(f"{x:02x}" for x in ram_slice), "|",
-                "".join(chr(x) if chr(x) in "".join([string.digits, string.ascii_letters, string.punctuation]) else '.' for x in ram_slice),
+                ram_slice.hex(" "), "|",
+                ram_slice.translate(PRINTABLE).decode("ascii"),
                 file=file
-            )
\ No newline at end of file
+            )
@@ -1,6 +1,8 @@
 from .ram import RAM
 
 class Stack:
+    __slots__ = ('_ram', '_sp')
+
     def __init__(self, ram: RAM, origin:int=0x1FF):
         self._ram = ram
         self._sp = origin
@@ -10,19 +12,14 @@ class Stack:
         return self._sp & 0xFF
 
     def set_sp(self, val:int):
-        self._sp = (0x0100 | (val & 0xFF)) & 0x01FF
+        self._sp = 0x0100 | (val & 0xFF)
 
     def push(self, data: int):
-        self._ram.store[self._sp] = data
-        self._decrement_sp()
+        sp = self._sp
+        self._ram.store[sp] = data
+        self._sp = 0x0100 | ((sp - 1) & 0xFF)
 
     def pop(self) -> int:
-        self._increment_sp()
-        data = self._ram.store[self._sp]
-        return data
-
-    def _decrement_sp(self):
-        self._sp = ((self._sp - 1) & 0xFF) | 0x0100
-
-    def _increment_sp(self):
-        self._sp = ((self._sp + 1) & 0xFF) | 0x0100
+        sp = 0x0100 | ((self._sp + 1) & 0xFF)
+        self._sp = sp
+        return self._ram.store[sp]
@@ -1,4 +1,6 @@
 class ProgramCounter:
+    __slots__ = ('reg',)
+
     def __init__(self, start=0):
         self.reg = start
 
@@ -10,14 +12,12 @@ class ProgramCounter:
 
     def set_pc_lo(self, pc_lo: int):
         self.reg = (self.reg & 0xFF00) | (pc_lo & 0xFF)
-        self.reg &= 0xFFFF
 
     def set_pc_hi(self, pc_hi: int):
-        self.reg = (pc_hi << 8) | (self.reg & 0xFF)
-        self.reg &= 0xFFFF
+        self.reg = ((pc_hi & 0xFF) << 8) | (self.reg & 0xFF)
 
     def advance_pc(self):
-        self.reg = (self.reg + 1) % 0xFFFF
+        self.reg = (self.reg + 1) & 0xFFFF
 
     def displace_pc(self, displacement):
         self.reg = (self.reg + displacement) & 0xFFFF
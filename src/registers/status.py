@@ -1,69 +1,50 @@
-import bitarray
-import bitarray.util
-
 from utils.sign import to_signed
 
+def _flag(bit):
+    keep = ~(1 << bit) & 0xFF
+
+    def get(self):
+        return (self.reg >> bit) & 1
+
+    def set(self, val):
+        self.reg = (self.reg & keep) | ((val & 1) << bit)
+
+    return property(get, set)
+
 class FlagRegister:
+    __slots__ = ('reg',)
+
+    # The whole P register lives in reg, laid out as NV-BDIZC. The
+    # properties below read and write single bits of it.
+    sign = _flag(7)
+    overflow = _flag(6)
+    unused = _flag(5)
+    break_ = _flag(4)
+    decimal = _flag(3)
+    interrupt = _flag(2)
+    zero = _flag(1)
+    carry = _flag(0)
+
     def __init__(self):
-        self.sign = 0
-        self.overflow = 0
-        self.break_ = 0
-        self.decimal = 0
-        self.interrupt = 0
-        self.zero = 0
-        self.carry = 0
-        self.unused = 0
+        self.reg = 0
 
     def update_flags(self, val):
-        self.sign = (0x80 & val) >> 7
-        self.overflow = (0x40 & val) >> 6
-        self.unused = (0x20 & val) >> 5
-        self.break_ = (0x10 & val) >> 4
-        self.decimal = (0x08 & val) >> 3
-        self.interrupt = (0x04 & val) >> 2
-        self.zero = (0x02 & val) >> 1
-        self.carry = 0x01 & val
+        self.reg = val & 0xFF
 
     def update_sign(self, val):
-        if (val & 0x80) == 0x80:
-            self.sign = 1
-        else:
-            self.sign = 0
+        self.reg = (self.reg & 0x7F) | (val & 0x80)
 
     def update_zero(self, val):
-        if val == 0:
-            self.zero = 1
-        else:
-            self.zero = 0
+        self.reg = (self.reg & 0xFD) | ((val == 0) << 1)
 
     def update_carry(self, val, bit_high=True):
         if bit_high:
-            if (val & 0xFF00):
-                self.carry = 1
-            else:
-                self.carry = 0
+            self.reg = (self.reg & 0xFE) | ((val & 0xFF00) != 0)
         else:
-            if (val & 0x01) == 0x01:
-                self.carry = 1
-            else:
-                self.carry = 0
+            self.reg = (self.reg & 0xFE) | (val & 0x01)
 
     def update_overflow(self, result, acc, mem):
-        if (result ^ mem) & (result ^ acc) & 0x0080 == 0x80:
-            self.overflow = 1
-        else:
-            self.overflow = 0
+        self.reg = (self.reg & 0xBF) | (((result ^ mem) & (result ^ acc) & 0x80) >> 1)
 
     def to_int(self):
-        b = bitarray.bitarray([
-            self.sign,
-            self.overflow,
-            self.unused,
-            self.break_,
-            self.decimal,
-            self.interrupt,
-            self.zero,
-            self.carry
-        ])
-
-        return bitarray.util.ba2int(b, signed=False)
\ No newline at end of file
+        return self.reg
@@ -1,11 +1,18 @@
 import string
 
+# Maps each byte to itself if it is a printable, non-space ASCII character
+# and to '.' otherwise, for the text column of a memory dump.
+PRINTABLE = bytes(
+    c if chr(c) in "".join([string.digits, string.ascii_letters, string.punctuation]) else ord(".")
+    for c in range(256)
+)
+
 def memdump(mem) -> None:
     for n in range(0, len(mem), 16):
-        mem_slice = mem[n : n + 16]
+        mem_slice = bytes(mem[n : n + 16])
 
         print(
             f"{n:04x}",
-            " ".join(f"{x:02x}" for x in mem_slice), "|",
-            "".join(chr(x) if chr(x) in "".join([string.digits, string.ascii_letters, string.punctuation]) else '.' for x in mem_slice)
-        )
\ No newline at end of file
+            mem_slice.hex(" "), "|",
+            mem_slice.translate(PRINTABLE).decode("ascii")
+        )
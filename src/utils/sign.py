@@ -1,8 +1,5 @@
 def to_8bit_signed(n: int) -> int:
-        if n & 0x80:
-            return ((~n & 0xff) + 1) * -1
-        else:
-            return n
+    return ((n & 0xff) ^ 0x80) - 0x80
 
 def to_signed(n: int) -> int:
             return ((~n & 0xff) + 1) * -1
\ No newline at end of file